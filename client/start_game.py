@@ -153,6 +153,22 @@ class Grid:
                 pygame.display.update()
                 pygame.time.delay(5)
 
+    def solve_gui(self):
+        """
+        This function solves the board live, drawing
+        every step as the server streams it
+        """
+        for action, row, col, value in sudoku_game.solve_stream(self.model):
+            if action not in ("place", "backtrack"):
+                continue
+
+            self.cubes[row][col].set(value)
+            self.cubes[row][col].draw_change(self.win, action == "place")
+            self.board[row][col] = value
+            self.update_model()
+            pygame.display.update()
+            pygame.event.pump()
+
 
 class Cube:
     """
@@ -464,10 +480,13 @@ def main():
                 # Solve Button Clicked
                 elif 220 <= pos[0] <= 310 and 560 <= pos[1] <= 560 + 33:
                     solved_board = sudoku_game.solve(board.board)
-                    board.update_grid(solved_board)
-                    strikes = 0
-                    play_time = "Solved!!!"
-                    start = "stop"
+                    if solved_board is None:
+                        strikes = 1
+                    else:
+                        board.update_grid(solved_board)
+                        strikes = 0
+                        play_time = "Solved!!!"
+                        start = "stop"
                 elif clicked:
                     board.select(clicked[0], clicked[1])
                     key = None
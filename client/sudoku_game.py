@@ -1,10 +1,31 @@
 import requests
 import json
+import os
+import threading
 
 
 SOLVE_ENDPOINT = "http://127.0.0.1:5000/solve"
+SOLVE_STREAM_ENDPOINT = "http://127.0.0.1:5000/solve/stream"
+SOLVE_BATCH_ENDPOINT = "http://127.0.0.1:5000/solve/batch"
 GENERATE_ENDPOINT = "http://127.0.0.1:5000/generate"
 
+BINARY_MIMETYPE = "application/x-sudoku"
+
+# Actions of /solve/stream steps, coded by position in binary responses
+STREAM_ACTIONS = ("place", "backtrack", "solved", "failed", "budget")
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".sudoku", "cache.json")
+
+# Prefetched puzzles kept per difficulty
+STOCK_SIZE = 5
+
+# Solutions kept, least recently used are evicted first
+SOLUTIONS_SIZE = 100
+
+cache = None
+cache_lock = threading.Lock()
+refill_thread = None
+
 
 def string_to_board(board_in_string):
     """Converts string into sudoku board
@@ -40,36 +61,376 @@ def board_to_string(board):
     return board_in_string
 
 
-def solve(board):
+def board_to_bytes(board):
+    """Packs sudoku board into 41 bytes, one cell per 4 bits
+
+    params : board : list
+
+    returns : bytes
+    """
+    cells = [board[row][col] for row in range(9) for col in range(9)] + [0]
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, 82, 2))
+
+
+def bytes_to_board(board_in_bytes):
+    """Unpacks sudoku board packed by board_to_bytes
+
+    params : board_in_bytes : bytes (41 bytes)
+
+    returns : list
+    """
+    if len(board_in_bytes) != 41:
+        raise ValueError("Packed board must be 41 bytes")
+
+    cells = []
+    for byte in board_in_bytes:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+
+    if max(cells) > 9:
+        raise ValueError("Packed board has cell greater than 9")
+
+    return [cells[row * 9 : row * 9 + 9] for row in range(9)]
+
+
+def pack_frames(payloads):
+    """Joins payloads into one message, each prefixed by its length
+    as 2 byte big endian integer
+
+    params : payloads : list (list of bytes)
+
+    returns : bytes
+    """
+    message = b""
+    for payload in payloads:
+        message += len(payload).to_bytes(2, "big") + payload
+    return message
+
+
+def unpack_frames(message):
+    """Splits message built by pack_frames into payloads
+
+    params : message : bytes
+
+    returns : list (list of bytes)
+    """
+    payloads = []
+    index = 0
+
+    while index < len(message):
+        if index + 2 > len(message):
+            raise ValueError("Truncated frame header")
+        length = int.from_bytes(message[index : index + 2], "big")
+        index += 2
+        if index + length > len(message):
+            raise ValueError("Truncated frame")
+        payloads.append(message[index : index + length])
+        index += length
+
+    return payloads
+
+
+def request_solve(board, binary=False):
     """Solves sudoku by making api call
 
     params : board : list (sudoku 9x9 grid)
 
-    returns : solved_board : list (sudoku 9x9 grid)
+    : binary : boolean (True to send packed boards instead of json)
+
+    returns : solved_board : list (sudoku 9x9 grid) or None if board
+    has no solution
     """
+    if binary:
+        response = requests.post(
+            SOLVE_ENDPOINT,
+            data=board_to_bytes(board),
+            headers={"Content-Type": BINARY_MIMETYPE, "Accept": BINARY_MIMETYPE},
+        )
+        response.raise_for_status()
+        if response.headers.get("X-Sudoku-Valid") != "true":
+            return None
+        return bytes_to_board(response.content)
+
     board_in_string = board_to_string(board)
     payload = {"board": board_in_string}
     response = requests.post(
         SOLVE_ENDPOINT,
         data=json.dumps(payload),
         headers={"Content-Type": "application/json"},
-    ).json()
+    )
+    response.raise_for_status()
+    response = response.json()
+    if not response["valid"]:
+        return None
     solved_board = string_to_board(response["output_board"])
     return solved_board
 
 
-def generate(difficulty):
+def read_binary_steps(response):
+    """Reads framed binary steps of /solve/stream as they arrive
+
+    params : response : requests.Response (opened with stream=True)
+
+    yields : tuple (action, row, col, value), see solve_stream
+    """
+    buffer = b""
+
+    for chunk in response.iter_content(chunk_size=None):
+        buffer += chunk
+
+        # Handle every complete frame received so far
+        while len(buffer) >= 2:
+            length = int.from_bytes(buffer[:2], "big")
+            if len(buffer) < 2 + length:
+                break
+            frame = buffer[2 : 2 + length]
+            buffer = buffer[2 + length :]
+
+            action = STREAM_ACTIONS[frame[0]]
+            if len(frame) == 3:
+                yield (action, frame[1] // 9, frame[1] % 9, frame[2])
+            else:
+                yield (action, -1, -1, bytes_to_board(frame[1:]))
+
+    if buffer:
+        raise ValueError("Truncated frame")
+
+
+def solve_stream(board, budget=None, binary=False):
+    """Solves sudoku by making api call and yields steps as server sends them
+
+    params : board : list (sudoku 9x9 grid)
+
+    : budget : int (max no of placements, None for server maximum)
+
+    : binary : boolean (True to receive framed binary steps instead of
+    server sent events)
+
+    yields : tuple (action, row, col, value), action is "place",
+    "backtrack", "solved", "failed" or "budget". For last three row and
+    col are -1 and value is the output board (list)
+    """
+    payload = {"board": board_to_string(board)}
+    if budget is not None:
+        payload["budget"] = budget
+
+    headers = {"Content-Type": "application/json"}
+    if binary:
+        headers["Accept"] = BINARY_MIMETYPE
+
+    response = requests.post(
+        SOLVE_STREAM_ENDPOINT,
+        data=json.dumps(payload),
+        headers=headers,
+        stream=True,
+    )
+    response.raise_for_status()
+
+    if binary:
+        yield from read_binary_steps(response)
+        return
+
+    action = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            action = line[len("event: ") :]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: ") :])
+            if "output_board" in data:
+                yield (action, -1, -1, string_to_board(data["output_board"]))
+            else:
+                yield (action, data["row"], data["col"], data["value"])
+
+
+def solve_batch(boards, binary=False):
+    """Solves many sudokus in one api call
+
+    params : boards : list (list of sudoku 9x9 grids)
+
+    : binary : boolean (True to send packed boards instead of json)
+
+    returns : list (solved board, or None where board has no solution)
+    """
+    if binary:
+        response = requests.post(
+            SOLVE_BATCH_ENDPOINT,
+            data=pack_frames([board_to_bytes(board) for board in boards]),
+            headers={"Content-Type": BINARY_MIMETYPE, "Accept": BINARY_MIMETYPE},
+        )
+        response.raise_for_status()
+        return [
+            bytes_to_board(frame) if frame else None
+            for frame in unpack_frames(response.content)
+        ]
+
+    payload = {"boards": [board_to_string(board) for board in boards]}
+    response = requests.post(
+        SOLVE_BATCH_ENDPOINT,
+        data=json.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    )
+    response.raise_for_status()
+    response = response.json()
+    return [
+        string_to_board(result["output_board"]) if result["valid"] else None
+        for result in response["results"]
+    ]
+
+
+def request_generate(difficulty, binary=False):
     """Generates sudoku based on difficulty by making an api call
 
     params : difficulty : string ("easy" / "hard")
 
+    : binary : boolean (True to receive packed board instead of json)
+
     returns : board : list (sudoku 9x9 grid)
     """
     payload = {"difficulty": difficulty}
+    headers = {"Content-Type": "application/json"}
+    if binary:
+        headers["Accept"] = BINARY_MIMETYPE
+
     response = requests.post(
         GENERATE_ENDPOINT,
         data=json.dumps(payload),
-        headers={"Content-Type": "application/json"},
-    ).json()
+        headers=headers,
+    )
+    response.raise_for_status()
+    if binary:
+        return bytes_to_board(response.content)
+
+    response = response.json()
     board = string_to_board(response["board"])
     return board
+
+
+def load_cache():
+    """Loads puzzle cache from disk once, starting empty if there is none
+
+    returns : dict
+    """
+    global cache
+
+    if cache is None:
+        try:
+            with open(CACHE_PATH) as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            cache = {"stock": {}, "solutions": {}}
+
+    return cache
+
+
+def save_cache():
+    """Writes puzzle cache to disk, replacing old file in one step.
+    If disk is not writable game carries on with cache in memory"""
+    temp_path = CACHE_PATH + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(temp_path, "w") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(temp_path, CACHE_PATH)
+    except OSError:
+        pass
+
+
+def remember_solution(board_in_string, solution_in_string):
+    """Stores solution, evicting least recently used ones over SOLUTIONS_SIZE
+
+    params : board_in_string : string
+
+    : solution_in_string : string
+    """
+    solutions = load_cache()["solutions"]
+    solutions.pop(board_in_string, None)
+    solutions[board_in_string] = solution_in_string
+
+    while len(solutions) > SOLUTIONS_SIZE:
+        del solutions[next(iter(solutions))]
+
+
+def refill():
+    """Tops up stock of every difficulty with puzzles and their solutions,
+    stops quietly when server is not reachable"""
+    for difficulty in ("easy", "hard"):
+        while True:
+            with cache_lock:
+                stock = load_cache()["stock"].setdefault(difficulty, [])
+                if len(stock) >= STOCK_SIZE:
+                    break
+
+            try:
+                board = request_generate(difficulty)
+                solution = request_solve(board)
+            except (requests.RequestException, ValueError):
+                return
+
+            with cache_lock:
+                stock.append(board_to_string(board))
+                if solution is not None:
+                    remember_solution(board_to_string(board), board_to_string(solution))
+                save_cache()
+
+
+def refill_async():
+    """Tops up stock in background thread, unless one is running already"""
+    global refill_thread
+
+    with cache_lock:
+        if refill_thread is not None and refill_thread.is_alive():
+            return
+        refill_thread = threading.Thread(target=refill, daemon=True)
+        refill_thread.start()
+
+
+def solve(board, binary=False):
+    """Solves sudoku from cache, making api call only for unknown boards
+
+    params : board : list (sudoku 9x9 grid)
+
+    : binary : boolean (True to send packed boards instead of json)
+
+    returns : solved_board : list (sudoku 9x9 grid) or None if board
+    has no solution
+    """
+    board_in_string = board_to_string(board)
+
+    with cache_lock:
+        solution = load_cache()["solutions"].get(board_in_string)
+        if solution is not None:
+            remember_solution(board_in_string, solution)
+            return string_to_board(solution)
+
+    solved_board = request_solve(board, binary)
+    if solved_board is None:
+        return None
+
+    with cache_lock:
+        remember_solution(board_in_string, board_to_string(solved_board))
+        save_cache()
+
+    return solved_board
+
+
+def generate(difficulty, binary=False):
+    """Generates sudoku based on difficulty, taking prefetched one from
+    cache when there is one, and tops up the stock in background
+
+    params : difficulty : string ("easy" / "hard")
+
+    : binary : boolean (True to receive packed board instead of json)
+
+    returns : board : list (sudoku 9x9 grid)
+    """
+    with cache_lock:
+        stock = load_cache()["stock"].setdefault(difficulty, [])
+        board_in_string = stock.pop(0) if stock else None
+        if board_in_string is not None:
+            save_cache()
+
+    refill_async()
+
+    if board_in_string is not None:
+        return string_to_board(board_in_string)
+    return request_generate(difficulty, binary)
@@ -2,7 +2,7 @@ import sudoku
 import random
 
 
-def get_complete_sudoku(board, row, col):
+def get_complete_sudoku(board, row, col, rng=random):
     """Generates valid sudoku with random entries
 
     params : board : list (sudoku 9x9 grid)
@@ -10,6 +10,8 @@ def get_complete_sudoku(board, row, col):
     : row : int
 
     : col : int
+
+    : rng : random.Random (source of randomness, random module by default)
     """
 
     if row == 8 and col == 8:
@@ -27,26 +29,28 @@ def get_complete_sudoku(board, row, col):
     if len(valid_entries) == 0:
         return False
 
-    random.shuffle(valid_entries)
+    rng.shuffle(valid_entries)
 
     # Fill Sudoku
     for entry in valid_entries:
         board[row][col] = entry
-        if get_complete_sudoku(board, row, col + 1):
+        if get_complete_sudoku(board, row, col + 1, rng):
             return True
     board[row][col] = 0
     return False
 
 
-def remove_some_entries(board, difficulty):
+def remove_some_entries(board, difficulty, rng=random):
     """Removes some entries from sudoku based on difficulty
 
     board : list (sudoku 9x9 grid)
 
     : difficulty : string ("easy" or "hard")
+
+    : rng : random.Random (source of randomness, random module by default)
     """
     indices = list(range(81))
-    random.shuffle(indices)
+    rng.shuffle(indices)
 
     while indices:
         row = indices[0] // 9
@@ -70,13 +74,28 @@ def remove_some_entries(board, difficulty):
                 break
 
 
-def generate(difficulty):
+def daily_seed(day):
+    """Gives seed of puzzle of the day
+
+    params : day : datetime.date
+
+    returns : string
+    """
+    return "daily-" + day.isoformat()
+
+
+def generate(difficulty, seed=None):
     """Generates sudoku based on difficulty
 
     params : difficulty : str ("easy" / "hard")
+
+    : seed : str or int (same seed and difficulty give same sudoku,
+    None for a random one)
     """
+    rng = random if seed is None else random.Random(seed)
+
     difficulty.lower()
     board = [[0] * 9 for _ in range(9)]
-    get_complete_sudoku(board, 0, 0)
-    remove_some_entries(board, difficulty)
+    get_complete_sudoku(board, 0, 0, rng)
+    remove_some_entries(board, difficulty, rng)
     return sudoku.board_to_string(board)
@@ -0,0 +1,358 @@
+import argparse
+import functools
+import http.client
+import json
+import math
+import os
+import random
+import resource
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+
+# Boards solved by "solve" requests when no corpus file is given
+CORPUS = [
+    "080610002000700900000090073300107008060830020000000000893000010704500800000000000",
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+]
+
+# Request kinds : (path, payload builder)
+KINDS = {
+    "generate_easy": ("/generate", lambda corpus: {"difficulty": "easy"}),
+    "generate_hard": ("/generate", lambda corpus: {"difficulty": "hard"}),
+    "solve": ("/solve", lambda corpus: {"board": random.choice(corpus)}),
+}
+
+
+def parse_mix(mix):
+    """Parses request mix like "solve=4,generate_easy=1"
+
+    params : mix : string
+
+    returns : dict (kind -> weight)
+    """
+    weights = {}
+    for part in mix.split(","):
+        kind, weight = part.split("=")
+        if kind not in KINDS:
+            raise ValueError("Unknown request kind " + kind)
+        weights[kind] = float(weight)
+    return weights
+
+
+class TestClientTransport:
+    """Sends requests to the app in this process through Flask test client,
+    which cannot cut a request off, so no request ever times out"""
+
+    def __init__(self):
+        import server
+
+        self.client = server.app.test_client()
+
+    def send(self, path, payload):
+        """Sends one request
+
+        returns : string ("ok" or "error")
+        """
+        response = self.client.post(path, json=payload)
+        return "ok" if response.status_code == 200 else "error"
+
+
+class SocketTransport:
+    """Sends requests to a running server over HTTP"""
+
+    def __init__(self, url, timeout):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def send(self, path, payload):
+        """Sends one request, reconnecting after any failure
+
+        returns : string ("ok", "error" or "timeout")
+        """
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+
+        try:
+            self.connection.request(
+                "POST",
+                path,
+                body=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+            response = self.connection.getresponse()
+            response.read()
+            return "ok" if response.status == 200 else "error"
+        except socket.timeout:
+            result = "timeout"
+        except (OSError, http.client.HTTPException):
+            result = "error"
+
+        self.connection.close()
+        self.connection = None
+        return result
+
+
+def process_cpu_seconds(pid):
+    """Reads CPU time used by process and its reaped children
+
+    params : pid : int
+
+    returns : float
+    """
+    with open("/proc/" + str(pid) + "/stat") as stat_file:
+        # Fields after process name, which is in brackets and may hold spaces
+        fields = stat_file.read().rsplit(")", 1)[1].split()
+    ticks = sum(int(field) for field in fields[11:15])
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def descendant_pids(pid):
+    """Lists live child processes of pid and their children, e.g.
+    preforked workers and portfolio race processes
+
+    params : pid : int
+
+    returns : list (list of int)
+    """
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/" + entry + "/stat") as stat_file:
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(entry))
+
+    descendants = []
+    pending = [pid]
+    while pending:
+        children = parents.get(pending.pop(), [])
+        descendants.extend(children)
+        pending.extend(children)
+    return descendants
+
+
+def cpu_snapshot(pid):
+    """Reads CPU time of process and of each of its live descendants
+
+    params : pid : int
+
+    returns : dict (pid -> CPU seconds)
+    """
+    snapshot = {}
+    for process in [pid] + descendant_pids(pid):
+        try:
+            snapshot[process] = process_cpu_seconds(process)
+        except OSError:
+            # Exited while being read
+            pass
+    return snapshot
+
+
+def own_cpu_seconds():
+    """Reads CPU time used by this process and its reaped children
+
+    returns : float
+    """
+    usage = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        rusage = resource.getrusage(who)
+        usage += rusage.ru_utime + rusage.ru_stime
+    return usage
+
+
+def percentile(sorted_values, percent):
+    """Picks percentile from sorted values by nearest rank
+
+    params : sorted_values : list
+
+    : percent : float
+
+    returns : float
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run(transport_factory, weights, concurrency, duration, corpus):
+    """Drives load from concurrency threads until duration runs out
+
+    params : transport_factory : function (returns new transport)
+
+    : weights : dict (kind -> weight)
+
+    : concurrency : int
+
+    : duration : float (seconds)
+
+    : corpus : list (list of board strings)
+
+    returns : list (list of (kind, latency, result) tuples)
+    """
+    kinds = list(weights)
+    kind_weights = [weights[kind] for kind in kinds]
+    records = []
+    records_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        transport = transport_factory()
+        local_records = []
+
+        while time.perf_counter() < deadline:
+            kind = random.choices(kinds, kind_weights)[0]
+            path, build_payload = KINDS[kind]
+
+            start = time.perf_counter()
+            result = transport.send(path, build_payload(corpus))
+            local_records.append((kind, time.perf_counter() - start, result))
+
+        with records_lock:
+            records.extend(local_records)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return records
+
+
+def report(records, elapsed, cpu_usage, with_timeouts=True):
+    """Prints throughput, latency percentiles, error rates and CPU usage
+
+    params : records : list (list of (kind, latency, result) tuples)
+
+    : elapsed : float (seconds)
+
+    : cpu_usage : dict (process label -> CPU seconds)
+
+    : with_timeouts : boolean (False to leave out timeout rate, when
+    requests are never cut off)
+    """
+    kinds = sorted(set(kind for kind, latency, result in records))
+
+    columns = ("kind", "count", "req/s", "p50 ms", "p90 ms", "p99 ms", "max ms")
+    header = "%-14s %7s %9s %8s %8s %8s %8s %7s" % (columns + ("err %",))
+    if with_timeouts:
+        header += " %8s" % "tmout %"
+    print(header)
+
+    for kind in kinds + ["total"]:
+        selected = [
+            (latency, result)
+            for record_kind, latency, result in records
+            if kind in ("total", record_kind)
+        ]
+        latencies = sorted(latency * 1000 for latency, result in selected)
+        count = len(selected)
+        errors = sum(1 for latency, result in selected if result == "error")
+        timeouts = sum(1 for latency, result in selected if result == "timeout")
+
+        line = "%-14s %7d %9.1f %8.1f %8.1f %8.1f %8.1f %7.2f" % (
+            kind,
+            count,
+            count / elapsed,
+            percentile(latencies, 50),
+            percentile(latencies, 90),
+            percentile(latencies, 99),
+            percentile(latencies, 100),
+            100.0 * errors / max(count, 1),
+        )
+        if with_timeouts:
+            line += " %8.2f" % (100.0 * timeouts / max(count, 1))
+        print(line)
+
+    print()
+    for label, seconds in cpu_usage.items():
+        print("cpu %-20s %8.2f s %7.1f %%" % (label, seconds, 100 * seconds / elapsed))
+
+
+def main():
+    """Runs load test against the app and prints the report"""
+    parser = argparse.ArgumentParser(
+        description="Load test sudoku server. To measure how much one node can "
+        "serve, start it with prefork.py and pass --url and --server-pid. "
+        "Without --url the app runs in this process and shares its GIL with "
+        "the load generator, which is only good for quick comparisons."
+    )
+    parser.add_argument(
+        "--url", help="server to drive, like http://127.0.0.1:5000 (default: local)"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="seconds, only used with --url"
+    )
+    parser.add_argument(
+        "--mix",
+        default="solve=8,generate_easy=2",
+        help="weights per request kind, kinds are "
+        + ", ".join(KINDS)
+        + " (generate_hard can take tens of seconds per request)",
+    )
+    parser.add_argument("--corpus", help="file with one board per line to solve")
+    parser.add_argument(
+        "--server-pid",
+        type=int,
+        action="append",
+        default=[],
+        help="server process to report CPU usage for, together with its "
+        "child processes, may be repeated",
+    )
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus) as corpus_file:
+            corpus = [line.strip() for line in corpus_file if line.strip()]
+
+    if args.url:
+        transport_factory = functools.partial(SocketTransport, args.url, args.timeout)
+    else:
+        transport_factory = TestClientTransport
+
+    own_cpu_before = own_cpu_seconds()
+    snapshots_before = {pid: cpu_snapshot(pid) for pid in args.server_pid}
+
+    start = time.perf_counter()
+    records = run(transport_factory, weights, args.concurrency, args.duration, corpus)
+    elapsed = time.perf_counter() - start
+
+    cpu_usage = {"loadtest": own_cpu_seconds() - own_cpu_before}
+    for pid in args.server_pid:
+        before = snapshots_before[pid]
+        after = cpu_snapshot(pid)
+
+        # Processes started during the run count from zero
+        used = {process: after[process] - before.get(process, 0.0) for process in after}
+        cpu_usage["pid " + str(pid)] = used.get(pid, 0.0)
+        cpu_usage["pid " + str(pid) + " children"] = sum(
+            seconds for process, seconds in used.items() if process != pid
+        )
+
+    if not args.url:
+        print("In process run, app shares GIL with load generator (see --help)")
+        print()
+
+    report(records, elapsed, cpu_usage, with_timeouts=bool(args.url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+from contextlib import contextmanager
+import multiprocessing
+import os
+import queue
+import time
+import sudoku
+
+
+# Placements tried on fast path before puzzle is raced across processes
+FAST_PATH_BUDGET = 5000
+
+# Seconds to wait for race before giving up on puzzle
+RACE_TIMEOUT = 10.0
+
+# Placements between checks that process which started the race is alive
+PARENT_CHECK_INTERVAL = 10000
+
+# Search orders raced on hard puzzles : (cell order, reverse_entries)
+STRATEGIES = [
+    ("row", False),
+    ("row", True),
+    ("reverse", False),
+    ("reverse", True),
+    ("mrv", False),
+]
+
+# Races run at once by all processes forked after import, every race
+# keeps one CPU busy per strategy
+MAX_RACES = max(1, (os.cpu_count() or 1) // len(STRATEGIES))
+
+race_slots = multiprocessing.BoundedSemaphore(MAX_RACES)
+
+# Pid of process running race in each slot, 0 for free slot
+race_holders = multiprocessing.Array("i", MAX_RACES)
+
+
+def run_strategy(board_in_string, order, reverse_entries, results, parent_pid):
+    """Solves sudoku with one search order and reports back the answer,
+    gives up if process which started the race has died
+
+    params : board_in_string : string
+
+    : order : string (cell order, see sudoku.get_cell_to_fill)
+
+    : reverse_entries : boolean
+
+    : results : multiprocessing.Queue
+
+    : parent_pid : int
+    """
+    board = sudoku.string_to_board(board_in_string)
+    placements = 0
+
+    for action, row, col, entry in sudoku.solve_steps(board, order, reverse_entries):
+        if action == "place":
+            placements += 1
+            if placements % PARENT_CHECK_INTERVAL == 0 and os.getppid() != parent_pid:
+                return
+        elif action in ("solved", "failed"):
+            results.put((action == "solved", sudoku.board_to_string(board)))
+            return
+
+
+@contextmanager
+def race_slot(timeout=None):
+    """Holds one of MAX_RACES race slots while body runs
+
+    params : timeout : float (seconds to wait for free slot, None to wait)
+
+    yields : boolean (False if no slot got free in time)
+    """
+    if not race_slots.acquire(timeout=timeout):
+        yield False
+        return
+
+    with race_holders.get_lock():
+        index = list(race_holders).index(0)
+        race_holders[index] = os.getpid()
+
+    try:
+        yield True
+    finally:
+        with race_holders.get_lock():
+            race_holders[index] = 0
+        race_slots.release()
+
+
+def recover(pid):
+    """Frees race slots of process which died while racing, to be called
+    by the parent once it has reaped that process
+
+    params : pid : int (process which died)
+    """
+    with race_holders.get_lock():
+        for index in range(MAX_RACES):
+            if race_holders[index] == pid:
+                race_holders[index] = 0
+                race_slots.release()
+
+
+def race(board, timeout=None):
+    """Runs every strategy in its own process, takes first answer
+    and stops the rest, waiting first for a free race slot
+
+    params : board : list (sudoku 9x9 grid)
+
+    : timeout : float (seconds to wait in all, None to wait for an answer)
+
+    returns : True if solved, False if no solution, None on timeout
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    with race_slot(timeout) as acquired:
+        if not acquired:
+            return None
+
+        remaining = None if deadline is None else deadline - time.monotonic()
+        return run_race(board, remaining)
+
+
+def run_race(board, timeout):
+    """Races every strategy on board, see race
+
+    params : board : list (sudoku 9x9 grid)
+
+    : timeout : float (seconds to wait, None to wait for an answer)
+
+    returns : True if solved, False if no solution, None on timeout
+    """
+    board_in_string = sudoku.board_to_string(board)
+    results = multiprocessing.Queue()
+
+    workers = [
+        multiprocessing.Process(
+            target=run_strategy,
+            args=(board_in_string, order, reverse_entries, results, os.getpid()),
+            daemon=True,
+        )
+        for order, reverse_entries in STRATEGIES
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        solved, output_board = results.get(timeout=timeout)
+    except queue.Empty:
+        return None
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+    if solved:
+        board[:] = sudoku.string_to_board(output_board)
+    return solved
+
+
+def solve(board, budget=FAST_PATH_BUDGET, timeout=RACE_TIMEOUT):
+    """Solves sudoku on fast path, falls back to racing several search
+    orders once puzzle takes more than budget placements
+
+    params : board : list (sudoku 9x9 grid)
+
+    : budget : int (max no of placements on fast path)
+
+    : timeout : float (seconds to wait for race, None to wait for an answer)
+
+    returns : True if solved, False if no solution, None on timeout
+    """
+    if timeout is not None and timeout <= 0:
+        return None
+
+    # Clashing entries can never be solved, searching would only burn CPU
+    if sudoku.get_conflicts(board):
+        return False
+
+    attempt = [row[:] for row in board]
+    solved = sudoku.solve_iterative(attempt, budget)
+
+    if solved is None:
+        return race(board, timeout)
+
+    if solved:
+        board[:] = attempt
+    return solved
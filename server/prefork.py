@@ -0,0 +1,79 @@
+import argparse
+import os
+import signal
+import sys
+from werkzeug.serving import make_server
+
+# Imported before forking, so every worker starts with a warm copy
+import server
+import portfolio
+import puzzle_pool
+
+
+def spawn(target, *args):
+    """Forks child process which runs target and exits
+
+    params : target : function
+
+    returns : int (pid of child)
+    """
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            target(*args)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    """Serves the app from preforked workers which share one puzzle pool"""
+    parser = argparse.ArgumentParser(description="Run sudoku server in production")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--pool-size", type=int, default=16)
+    args = parser.parse_args()
+
+    pool = puzzle_pool.PuzzlePool(args.pool_size)
+    server.puzzle_pool = pool
+
+    # Socket is bound once here, all workers accept on it
+    httpd = make_server(args.host, args.port, server.app)
+
+    filler = spawn(puzzle_pool.fill_forever, pool)
+    workers = {spawn(httpd.serve_forever) for _ in range(args.workers)}
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        while True:
+            pid, status = os.wait()
+
+            # Child killed while holding pool lock or race slot would
+            # block every other
+            pool.recover(pid)
+            portfolio.recover(pid)
+
+            # Replace child which died
+            if pid == filler:
+                filler = spawn(puzzle_pool.fill_forever, pool)
+            elif pid in workers:
+                workers.remove(pid)
+                workers.add(spawn(httpd.serve_forever))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in workers | {filler}:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ChildProcessError, ProcessLookupError):
+                pass
+        httpd.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
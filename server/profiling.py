@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+import cProfile
+import glob
+import itertools
+import os
+import random
+import time
+
+
+# Directory where profiles and their inputs are written
+PROFILE_DIR = os.environ.get("SUDOKU_PROFILE_DIR", "profiles")
+
+# Fraction of requests profiled without being asked, 0 to switch off
+PROFILE_RATE = float(os.environ.get("SUDOKU_PROFILE_RATE", "0"))
+
+# Clients may only ask for a profile once this is switched on
+PROFILE_HEADER_ENABLED = os.environ.get("SUDOKU_PROFILE_HEADER", "0") == "1"
+
+# Oldest profiles are deleted beyond this count
+PROFILE_KEEP = int(os.environ.get("SUDOKU_PROFILE_KEEP", "200"))
+
+PROFILE_HEADER = "X-Sudoku-Profile"
+
+# Numbers profiles taken by this process, so that requests profiled on
+# two threads in the same millisecond do not overwrite each other
+profile_counter = itertools.count()
+
+
+def should_profile(headers):
+    """Decides whether request is to be profiled, either asked for
+    through header or picked by sampling
+
+    params : headers : dict like (request headers)
+
+    returns : boolean
+    """
+    if PROFILE_HEADER_ENABLED and headers.get(PROFILE_HEADER) == "1":
+        return True
+    return PROFILE_RATE > 0 and random.random() < PROFILE_RATE
+
+
+def rotate():
+    """Deletes oldest profiles so that at most PROFILE_KEEP are left"""
+    profiles = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.prof")))
+
+    for path in profiles[: max(0, len(profiles) - PROFILE_KEEP)]:
+        for stale in (path, path[: -len(".prof")] + ".txt"):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profiled(headers, kind, request_input):
+    """Runs body under cProfile when request is to be profiled, then
+    writes profile (.prof) and request input (.txt) to PROFILE_DIR
+
+    params : headers : dict like (request headers)
+
+    : kind : string (name of profiled work, e.g. "solve")
+
+    : request_input : string (board or difficulty, to replay request)
+
+    yields : string (profile id) or None if request is not profiled
+    """
+    if not should_profile(headers):
+        yield None
+        return
+
+    # Names sort by time, which rotate relies on
+    profile_id = "%d-%d-%d-%s" % (
+        time.time() * 1000,
+        os.getpid(),
+        next(profile_counter),
+        kind,
+    )
+    profiler = cProfile.Profile()
+
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already running in this process
+        yield None
+        return
+
+    start = time.perf_counter()
+    try:
+        yield profile_id
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, profile_id)
+        profiler.dump_stats(path + ".prof")
+        with open(path + ".txt", "w") as input_file:
+            input_file.write(request_input + "\n")
+            input_file.write("elapsed %.6f s\n" % elapsed)
+        rotate()
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import struct
+import time
+import sudoku
+import generator
+
+
+EMPTY = 0
+FULL = 1
+
+# Slot : 1 state byte followed by puzzle packed by sudoku.board_to_bytes
+SLOT_SIZE = 42
+
+# Header : pid of process holding pool lock, 0 while lock is free
+HEADER = struct.Struct(">I")
+
+# Seconds lock may stay taken with no holder noted before it is taken
+# as left behind by a process killed right after acquiring it
+ORPHAN_WAIT = 0.1
+
+
+class PuzzlePool:
+    """
+    Stock of ready made puzzles kept in shared memory, so that
+    every worker forked after the pool is created takes puzzles
+    from the same stock
+    """
+
+    def __init__(self, capacity=16, difficulties=("easy", "hard")):
+        """Creates shared memory block with capacity slots per difficulty
+
+        params : capacity : int
+
+        : difficulties : tuple (tuple of strings)
+        """
+        self.capacity = capacity
+        self.difficulties = difficulties
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=HEADER.size + len(difficulties) * capacity * SLOT_SIZE
+        )
+        self.memory.buf[:] = bytes(self.memory.size)
+        self.lock = multiprocessing.Lock()
+
+    def slot_offsets(self, difficulty):
+        """Lists offsets of all slots of given difficulty
+
+        params : difficulty : string
+
+        returns : list (list of int)
+        """
+        first = self.difficulties.index(difficulty) * self.capacity
+        return [
+            HEADER.size + (first + slot) * SLOT_SIZE for slot in range(self.capacity)
+        ]
+
+    def get_holder(self):
+        """Reads pid of process holding pool lock
+
+        returns : int (0 if no holder is noted)
+        """
+        return HEADER.unpack_from(self.memory.buf, 0)[0]
+
+    @contextmanager
+    def locked(self):
+        """Holds pool lock while body runs, noting this process as holder"""
+        with self.lock:
+            HEADER.pack_into(self.memory.buf, 0, os.getpid())
+            try:
+                yield
+            finally:
+                HEADER.pack_into(self.memory.buf, 0, 0)
+
+    def recover(self, pid):
+        """Frees pool lock if process died while holding it, to be called
+        by the parent once it has reaped that process
+
+        params : pid : int (process which died)
+
+        returns : boolean (True if lock was freed)
+        """
+        holder = self.get_holder()
+
+        if holder == 0:
+            # Holder may have died before noting itself
+            if self.lock.acquire(timeout=ORPHAN_WAIT):
+                self.lock.release()
+                return False
+            if self.get_holder() != 0:
+                return False
+        elif holder != pid:
+            return False
+
+        HEADER.pack_into(self.memory.buf, 0, 0)
+        self.lock.release()
+        return True
+
+    def take(self, difficulty):
+        """Takes one puzzle out of the pool
+
+        params : difficulty : string
+
+        returns : string (board) or None if pool has no puzzle left
+        """
+        with self.locked():
+            for offset in self.slot_offsets(difficulty):
+                if self.memory.buf[offset] == FULL:
+                    self.memory.buf[offset] = EMPTY
+                    packed = bytes(self.memory.buf[offset + 1 : offset + SLOT_SIZE])
+                    return sudoku.board_to_string(sudoku.bytes_to_board(packed))
+        return None
+
+    def put(self, difficulty, board_in_string):
+        """Adds one puzzle to the pool
+
+        params : difficulty : string
+
+        : board_in_string : string
+
+        returns : boolean (False if pool is already full)
+        """
+        packed = sudoku.board_to_bytes(sudoku.string_to_board(board_in_string))
+
+        with self.locked():
+            for offset in self.slot_offsets(difficulty):
+                if self.memory.buf[offset] == EMPTY:
+                    self.memory.buf[offset + 1 : offset + SLOT_SIZE] = packed
+                    self.memory.buf[offset] = FULL
+                    return True
+        return False
+
+    def count(self, difficulty):
+        """Counts puzzles of given difficulty left in the pool
+
+        params : difficulty : string
+
+        returns : int
+        """
+        with self.locked():
+            return sum(
+                1
+                for offset in self.slot_offsets(difficulty)
+                if self.memory.buf[offset] == FULL
+            )
+
+    def close(self):
+        """Releases shared memory, to be called once by the process
+        which created the pool"""
+        self.memory.close()
+        self.memory.unlink()
+
+
+def fill_forever(pool, interval=0.5):
+    """Keeps topping up the pool, generating for the difficulty
+    which has fewest puzzles left
+
+    params : pool : PuzzlePool
+
+    : interval : float (seconds to sleep when pool is full)
+    """
+    while True:
+        counts = {
+            difficulty: pool.count(difficulty) for difficulty in pool.difficulties
+        }
+        difficulty = min(counts, key=counts.get)
+
+        if counts[difficulty] >= pool.capacity:
+            time.sleep(interval)
+            continue
+
+        pool.put(difficulty, generator.generate(difficulty))
@@ -1,20 +1,127 @@
-from flask import Flask, request, Response
+from flask import Flask, g, make_response, request, Response
+from functools import lru_cache
+import datetime
+import json
+import time
 import sudoku
 import generator
+import portfolio
+import profiling
 
 
 app = Flask(__name__)
 
+BINARY_MIMETYPE = "application/x-sudoku"
+
+# Actions of /solve/stream steps, coded by position in binary responses
+STREAM_ACTIONS = ("place", "backtrack", "solved", "failed", "budget")
+
+# Most placements one /solve/stream request may make, also used when
+# client asks for no budget
+STREAM_BUDGET = 20000
+
+# Shared stock of generated puzzles, set by prefork.py in production
+puzzle_pool = None
+
+
+@app.errorhandler(TimeoutError)
+def solve_timed_out(error):
+    return Response(str(error), 503)
+
+
+@app.after_request
+def add_profile_header(response):
+    """Tells client under which id its request was profiled"""
+    if g.get("profile_id"):
+        response.headers["X-Sudoku-Profile-Id"] = g.profile_id
+    return response
+
+
+def cacheable(response):
+    """Marks response which never changes for its url, so that clients
+    and proxies can keep it, and answers If-None-Match with 304
+
+    params : response : flask.Response
+
+    returns : flask.Response
+    """
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.vary.add("Accept")
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def wants_binary():
+    """Checks whether client asked for packed boards in response
+
+    returns : boolean
+    """
+    best = request.accept_mimetypes.best_match(["application/json", BINARY_MIMETYPE])
+    return best == BINARY_MIMETYPE
+
+
+def is_board_string(value):
+    """Checks whether value is a board of 81 digits
+
+    params : value : any (taken from request)
+
+    returns : boolean
+    """
+    return (
+        isinstance(value, str)
+        and len(value) == 81
+        and all(char in "0123456789" for char in value)
+    )
+
+
+@lru_cache(maxsize=1024)
+def get_solution(board_in_string):
+    """Solves sudoku once per distinct board and remembers the answer
+
+    params : board_in_string : string
+
+    returns : string (solved board) or None if board has no solution
+
+    raises : TimeoutError if solving took too long, so it is not remembered
+    """
+    board = sudoku.string_to_board(board_in_string)
+    solved = portfolio.solve(board)
+    if solved is None:
+        raise TimeoutError("Sudoku took too long to solve")
+    if solved:
+        return sudoku.board_to_string(board)
+    return None
+
+
+@lru_cache(maxsize=256)
+def get_seeded_puzzle(difficulty, seed):
+    """Generates sudoku once per difficulty and seed and remembers it
+
+    params : difficulty : string
+
+    : seed : string
+
+    returns : string
+    """
+    return generator.generate(difficulty, seed)
+
 
 @app.route("/solve", methods=["POST"])
 def solve():
-    payload = request.get_json()
+    if request.mimetype == BINARY_MIMETYPE:
+        try:
+            board = sudoku.bytes_to_board(request.get_data())
+        except ValueError as error:
+            return Response(str(error), 400)
+        board_in_string = sudoku.board_to_string(board)
+    else:
+        payload = request.get_json()
 
-    if (not payload) or ("board" not in payload):
-        return Response("You must provide sudoku board in request", 400)
+        if (not payload) or ("board" not in payload):
+            return Response("You must provide sudoku board in request", 400)
 
-    board_in_string = payload["board"]
-    board = sudoku.string_to_board(board_in_string)
+        board_in_string = payload["board"]
+        board = sudoku.string_to_board(board_in_string)
 
     response = {
         "valid": False,
@@ -22,10 +129,239 @@ def solve():
         "output_board": board_in_string,
     }
 
-    if sudoku.solve(board, 0, 0):
+    with profiling.profiled(request.headers, "solve", board_in_string) as g.profile_id:
+        solved = portfolio.solve(board)
+
+    if solved is None:
+        return Response("Sudoku took too long to solve", 503)
+
+    if solved:
         response["output_board"] = sudoku.board_to_string(board)
         response["valid"] = True
 
+    if wants_binary():
+        # Input board is not echoed back, client already has it
+        binary_response = Response(
+            sudoku.board_to_bytes(board), mimetype=BINARY_MIMETYPE
+        )
+        binary_response.headers["X-Sudoku-Valid"] = str(response["valid"]).lower()
+        return binary_response
+
+    return response
+
+
+@app.route("/solve", methods=["GET"])
+def solve_cacheable():
+    board_in_string = request.args.get("board", "")
+
+    if not is_board_string(board_in_string):
+        return Response("You must provide sudoku board of 81 digits in request", 400)
+
+    with profiling.profiled(request.headers, "solve", board_in_string) as g.profile_id:
+        solution = get_solution(board_in_string)
+
+    output_board = solution or board_in_string
+
+    if wants_binary():
+        response = Response(
+            sudoku.board_to_bytes(sudoku.string_to_board(output_board)),
+            mimetype=BINARY_MIMETYPE,
+        )
+        response.headers["X-Sudoku-Valid"] = str(solution is not None).lower()
+    else:
+        response = make_response(
+            {
+                "valid": solution is not None,
+                "input_board": board_in_string,
+                "output_board": output_board,
+            }
+        )
+
+    return cacheable(response)
+
+
+@app.route("/solve/batch", methods=["POST"])
+def solve_batch():
+    if request.mimetype == BINARY_MIMETYPE:
+        try:
+            boards = [
+                sudoku.bytes_to_board(frame)
+                for frame in sudoku.unpack_frames(request.get_data())
+            ]
+        except ValueError as error:
+            return Response(str(error), 400)
+    else:
+        payload = request.get_json()
+
+        if (not payload) or ("boards" not in payload):
+            return Response("You must provide sudoku boards in request", 400)
+
+        if not (
+            isinstance(payload["boards"], list)
+            and all(is_board_string(board) for board in payload["boards"])
+        ):
+            return Response("Boards must be sudoku boards of 81 digits", 400)
+
+        boards = [sudoku.string_to_board(board) for board in payload["boards"]]
+
+    # Whole batch shares one race timeout, not one per board
+    deadline = time.monotonic() + portfolio.RACE_TIMEOUT
+    solved = []
+    for board in boards:
+        valid = portfolio.solve(board, timeout=deadline - time.monotonic())
+        if valid is None:
+            return Response("Sudoku took too long to solve", 503)
+        solved.append(valid)
+
+    if wants_binary():
+        # Board without solution is sent back as an empty frame
+        frames = [
+            sudoku.board_to_bytes(board) if valid else b""
+            for board, valid in zip(boards, solved)
+        ]
+        return Response(sudoku.pack_frames(frames), mimetype=BINARY_MIMETYPE)
+
+    response = {
+        "results": [
+            {"valid": valid, "output_board": sudoku.board_to_string(board)}
+            for board, valid in zip(boards, solved)
+        ],
+    }
+
+    return response
+
+
+@app.route("/solve/stream", methods=["POST"])
+def solve_stream():
+    payload = request.get_json()
+
+    if (not payload) or ("board" not in payload):
+        return Response("You must provide sudoku board in request", 400)
+
+    budget = payload.get("budget")
+
+    if budget is not None and (type(budget) is not int or budget < 0):
+        return Response("Budget must be a non negative integer", 400)
+
+    if not is_board_string(payload["board"]):
+        return Response("Board must be sudoku board of 81 digits", 400)
+
+    board = sudoku.string_to_board(payload["board"])
+
+    if budget is None or budget > STREAM_BUDGET:
+        budget = STREAM_BUDGET
+
+    def steps():
+        # Clashing entries can never be solved, fail without searching
+        if sudoku.get_conflicts(board):
+            return iter([("failed", None, None, None)])
+        return sudoku.solve_steps(board, budget=budget)
+
+    def binary_events():
+        # Frame : action code, cell index and entry, or action code
+        # followed by packed output board for last step
+        for action, row, col, entry in steps():
+            code = STREAM_ACTIONS.index(action)
+            if action in ("solved", "failed", "budget"):
+                frame = bytes([code]) + sudoku.board_to_bytes(board)
+            else:
+                frame = bytes([code, row * 9 + col, entry])
+            yield sudoku.pack_frames([frame])
+
+    if wants_binary():
+        return Response(binary_events(), mimetype=BINARY_MIMETYPE)
+
+    def events():
+        for action, row, col, entry in steps():
+            data = {"row": row, "col": col, "value": entry}
+            if action in ("solved", "failed", "budget"):
+                data = {"output_board": sudoku.board_to_string(board)}
+
+            yield "event: " + action + "\ndata: " + json.dumps(data) + "\n\n"
+
+    return Response(events(), mimetype="text/event-stream")
+
+
+@app.route("/check", methods=["POST"])
+def check():
+    payload = request.get_json()
+
+    if (not payload) or ("board" not in payload):
+        return Response("You must provide sudoku board in request", 400)
+
+    if not is_board_string(payload["board"]):
+        return Response("Board must be sudoku board of 81 digits", 400)
+
+    if ("puzzle" in payload) and not is_board_string(payload["puzzle"]):
+        return Response("Puzzle must be sudoku board of 81 digits", 400)
+
+    board_in_string = payload["board"]
+    board = sudoku.string_to_board(board_in_string)
+
+    conflicts = sudoku.get_conflicts(board)
+    wrong = []
+
+    # Entries can be consistent and still be wrong, that needs a solution
+    if (not conflicts) and ("puzzle" in payload):
+        solution = get_solution(payload["puzzle"])
+        if solution:
+            wrong = [
+                [i // 9, i % 9]
+                for i in range(81)
+                if board_in_string[i] != "0" and board_in_string[i] != solution[i]
+            ]
+
+    response = {
+        "valid": not (conflicts or wrong),
+        "conflicts": [[row, col] for row, col in conflicts],
+        "wrong": wrong,
+    }
+
+    return response
+
+
+@app.route("/hint", methods=["POST"])
+def hint():
+    payload = request.get_json()
+
+    if (not payload) or ("board" not in payload):
+        return Response("You must provide sudoku board in request", 400)
+
+    if not is_board_string(payload["board"]):
+        return Response("Board must be sudoku board of 81 digits", 400)
+
+    if ("puzzle" in payload) and not is_board_string(payload["puzzle"]):
+        return Response("Puzzle must be sudoku board of 81 digits", 400)
+
+    board_in_string = payload["board"]
+    board = sudoku.string_to_board(board_in_string)
+
+    response = {
+        "found": False,
+        "deduced": False,
+        "row": None,
+        "col": None,
+        "value": None,
+    }
+
+    if sudoku.get_conflicts(board):
+        return response
+
+    found = sudoku.get_hint(board)
+    if found:
+        response["deduced"] = True
+    else:
+        # Propagation is stuck, take next entry from the solution
+        solution = get_solution(payload.get("puzzle", board_in_string))
+        if solution:
+            index = board_in_string.find("0")
+            if index != -1:
+                found = (index // 9, index % 9, int(solution[index]))
+
+    if found:
+        response["found"] = True
+        response["row"], response["col"], response["value"] = found
+
     return response
 
 
@@ -41,7 +377,18 @@ def generate():
     if difficulty not in ("easy", "hard"):
         return Response("Difficulty must be easy or hard", 400)
 
-    board = generator.generate(difficulty)
+    board = None
+    if puzzle_pool is not None:
+        board = puzzle_pool.take(difficulty)
+    if board is None:
+        with profiling.profiled(
+            request.headers, "generate", difficulty
+        ) as g.profile_id:
+            board = generator.generate(difficulty)
+
+    if wants_binary():
+        binary_board = sudoku.board_to_bytes(sudoku.string_to_board(board))
+        return Response(binary_board, mimetype=BINARY_MIMETYPE)
 
     response = {
         "difficulty": difficulty,
@@ -51,5 +398,46 @@ def generate():
     return response
 
 
+@app.route("/generate", methods=["GET"])
+def generate_cacheable():
+    difficulty = request.args.get("difficulty")
+
+    if difficulty not in ("easy", "hard"):
+        return Response("Difficulty must be easy or hard", 400)
+
+    seed = request.args.get("seed")
+
+    if (seed is not None) and ("date" in request.args):
+        return Response("You must provide either seed or date in request", 400)
+
+    if "date" in request.args:
+        try:
+            day = datetime.date.fromisoformat(request.args["date"])
+        except ValueError:
+            return Response("Date must be in YYYY-MM-DD format", 400)
+        seed = generator.daily_seed(day)
+
+    if seed is None:
+        return Response("You must provide seed or date in request", 400)
+
+    request_input = difficulty + " " + seed
+    with profiling.profiled(request.headers, "generate", request_input) as g.profile_id:
+        board = get_seeded_puzzle(difficulty, seed)
+
+    if wants_binary():
+        binary_board = sudoku.board_to_bytes(sudoku.string_to_board(board))
+        response = Response(binary_board, mimetype=BINARY_MIMETYPE)
+    else:
+        response = make_response(
+            {
+                "difficulty": difficulty,
+                "seed": seed,
+                "board": board,
+            }
+        )
+
+    return cacheable(response)
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -173,3 +173,304 @@ def solve(board, row, col):
         return False
 
     return solve(board, row, col + 1)
+
+
+def get_conflicts(board):
+    """Finds filled cells which clash with another entry in the same
+    row, column or square
+
+    params : board : list (sudoku 9x9 grid)
+
+    returns : list (sorted list of (row, col) tuples)
+    """
+    seen = {}
+    conflicts = set()
+
+    for row in range(9):
+        for col in range(9):
+            entry = board[row][col]
+            if entry == 0:
+                continue
+
+            square = (row // 3) * 3 + col // 3
+            for key in (
+                ("row", row, entry),
+                ("col", col, entry),
+                ("square", square, entry),
+            ):
+                if key in seen:
+                    conflicts.add(seen[key])
+                    conflicts.add((row, col))
+                else:
+                    seen[key] = (row, col)
+
+    return sorted(conflicts)
+
+
+def get_hint(board):
+    """Finds next placement which follows from propagation alone
+    (naked single or hidden single), without any search
+
+    params : board : list (sudoku 9x9 grid)
+
+    returns : tuple (row, col, entry) or None if nothing can be deduced
+    """
+    candidates = {}
+
+    # Naked single : cell with only one valid entry
+    for row in range(9):
+        for col in range(9):
+            if board[row][col] != 0:
+                continue
+
+            valid_entries = get_valid_entries(board, row, col)
+            if len(valid_entries) == 0:
+                return None
+            if len(valid_entries) == 1:
+                return (row, col, valid_entries[0])
+            candidates[(row, col)] = valid_entries
+
+    # Hidden single : entry which fits only one cell of a row, column or square
+    units = []
+    for m in range(9):
+        units.append([(m, n) for n in range(9)])
+        units.append([(n, m) for n in range(9)])
+        units.append([((m // 3) * 3 + n // 3, (m % 3) * 3 + n % 3) for n in range(9)])
+
+    for unit in units:
+        places = {}
+        for cell in unit:
+            for entry in candidates.get(cell, []):
+                places.setdefault(entry, []).append(cell)
+
+        for entry in range(1, 10):
+            if len(places.get(entry, [])) == 1:
+                row, col = places[entry][0]
+                return (row, col, entry)
+
+    return None
+
+
+def get_next_empty_cell(board, start=0):
+    """Finds first empty cell in row major order
+
+    params : board : list (sudoku 9x9 grid)
+
+    : start : int (index of cell to start looking from, 0 to 80)
+
+    returns : tuple (row, col) or None if board is full
+    """
+    for index in range(start, 81):
+        if board[index // 9][index % 9] == 0:
+            return (index // 9, index % 9)
+    return None
+
+
+def get_cell_to_fill(board, last=None, order="row"):
+    """Picks next empty cell to fill for given search order
+
+    params : board : list (sudoku 9x9 grid)
+
+    : last : int (index of cell filled last, None if nothing filled yet)
+
+    : order : string ("row" : row major, "reverse" : row major from
+    bottom right, "mrv" : cell with fewest valid entries)
+
+    returns : tuple (row, col) or None if board is full
+    """
+    if order == "row":
+        return get_next_empty_cell(board, 0 if last is None else last + 1)
+
+    if order == "reverse":
+        start = 80 if last is None else last - 1
+        for index in range(start, -1, -1):
+            if board[index // 9][index % 9] == 0:
+                return (index // 9, index % 9)
+        return None
+
+    best_cell = None
+    fewest_entries = 10
+
+    for row in range(9):
+        for col in range(9):
+            if board[row][col] != 0:
+                continue
+
+            no_of_entries = len(get_valid_entries(board, row, col))
+            if no_of_entries < fewest_entries:
+                best_cell = (row, col)
+                fewest_entries = no_of_entries
+                if no_of_entries <= 1:
+                    return best_cell
+
+    return best_cell
+
+
+def solve_steps(board, order="row", reverse_entries=False, budget=None):
+    """Solves sudoku using DFS with an explicit stack and yields every step
+
+    Each step is a tuple (action, row, col, entry) where action is
+    "place", "backtrack", "solved", "failed" or "budget". The generator
+    can be paused between steps and resumed later, board holds the
+    partial state in between.
+
+    params : board : list (sudoku 9x9 grid)
+
+    : order : string (cell order, see get_cell_to_fill)
+
+    : reverse_entries : boolean (True to try entries from 9 down to 1)
+
+    : budget : int (max no of placements, None for no limit). Search
+    stops with "budget" step before placement past the budget is made
+    """
+    # Frame : [row, col, entries left to try], next entry at the end
+    stack = []
+    placements = 0
+    cell = get_cell_to_fill(board, None, order)
+
+    while True:
+        if cell is None:
+            yield ("solved", -1, -1, 0)
+            return
+
+        valid_entries = get_valid_entries(board, cell[0], cell[1])
+        if len(valid_entries) != 0:
+            if not reverse_entries:
+                valid_entries.reverse()
+            stack.append([cell[0], cell[1], valid_entries])
+
+        # Undo cells which ran out of entries
+        while stack and len(stack[-1][2]) == 0:
+            row, col, entries = stack.pop()
+            board[row][col] = 0
+            yield ("backtrack", row, col, 0)
+
+        if not stack:
+            yield ("failed", -1, -1, 0)
+            return
+
+        if budget is not None and placements >= budget:
+            yield ("budget", -1, -1, 0)
+            return
+
+        row, col, entries = stack[-1]
+        board[row][col] = entries.pop()
+        placements += 1
+        yield ("place", row, col, board[row][col])
+
+        cell = get_cell_to_fill(board, row * 9 + col, order)
+
+
+def solve_iterative(board, budget=None):
+    """Solves sudoku without recursion, same row major search as solve
+    but able to stop after budget placements
+
+    params : board : list (sudoku 9x9 grid)
+
+    : budget : int (max no of placements, None for no limit)
+
+    returns : True if solved, False if no solution, None if budget ran out
+    """
+    # In row major order cells are filled in order of this list
+    empty_cells = [
+        (row, col) for row in range(9) for col in range(9) if board[row][col] == 0
+    ]
+    entries_left = [None] * len(empty_cells)
+    placements = 0
+    depth = 0
+
+    while depth < len(empty_cells):
+        row, col = empty_cells[depth]
+
+        entries = entries_left[depth]
+        if entries is None:
+            entries = get_valid_entries(board, row, col)
+            entries.reverse()
+            entries_left[depth] = entries
+
+        if not entries:
+            # Ran out of entries, go back to previous cell
+            board[row][col] = 0
+            entries_left[depth] = None
+            depth -= 1
+            if depth < 0:
+                return False
+            continue
+
+        if placements == budget:
+            return None
+
+        board[row][col] = entries.pop()
+        placements += 1
+        depth += 1
+
+    return True
+
+
+def board_to_bytes(board):
+    """Packs sudoku board into 41 bytes, one cell per 4 bits
+
+    params : board : list (sudoku 9x9 grid)
+
+    returns : bytes
+    """
+    cells = [board[row][col] for row in range(9) for col in range(9)] + [0]
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, 82, 2))
+
+
+def bytes_to_board(board_in_bytes):
+    """Unpacks sudoku board packed by board_to_bytes
+
+    params : board_in_bytes : bytes (41 bytes)
+
+    returns : list
+    """
+    if len(board_in_bytes) != 41:
+        raise ValueError("Packed board must be 41 bytes")
+
+    cells = []
+    for byte in board_in_bytes:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+
+    if max(cells) > 9:
+        raise ValueError("Packed board has cell greater than 9")
+
+    return [cells[row * 9 : row * 9 + 9] for row in range(9)]
+
+
+def pack_frames(payloads):
+    """Joins payloads into one message, each prefixed by its length
+    as 2 byte big endian integer
+
+    params : payloads : list (list of bytes)
+
+    returns : bytes
+    """
+    message = b""
+    for payload in payloads:
+        message += len(payload).to_bytes(2, "big") + payload
+    return message
+
+
+def unpack_frames(message):
+    """Splits message built by pack_frames into payloads
+
+    params : message : bytes
+
+    returns : list (list of bytes)
+    """
+    payloads = []
+    index = 0
+
+    while index < len(message):
+        if index + 2 > len(message):
+            raise ValueError("Truncated frame header")
+        length = int.from_bytes(message[index : index + 2], "big")
+        index += 2
+        if index + length > len(message):
+            raise ValueError("Truncated frame")
+        payloads.append(message[index : index + length])
+        index += length
+
+    return payloads
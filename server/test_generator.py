@@ -0,0 +1,17 @@
+import generator
+import sudoku
+
+
+def test_generate_gives_same_puzzle_for_same_seed():
+    assert generator.generate("easy", "daily") == generator.generate("easy", "daily")
+    assert generator.generate("easy", 7) == generator.generate("easy", 7)
+
+
+def test_generate_gives_different_puzzles_for_different_seeds():
+    assert generator.generate("easy", "a") != generator.generate("easy", "b")
+
+
+def test_generate_seeded_puzzle_is_solvable():
+    board = sudoku.string_to_board(generator.generate("easy", "solvable"))
+
+    assert sudoku.solve_iterative(board) is True
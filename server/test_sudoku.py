@@ -0,0 +1,146 @@
+import pytest
+import sudoku
+
+
+PUZZLE = (
+    "080610002000700900000090073300107008060830020000000000893000010704500800000000000"
+)
+SOLUTION = (
+    "987613452236745981451298673342167598569834127178952364893476215714529836625381749"
+)
+
+# Cells (0, 0) and (8, 8) have no valid entry, but givens do not clash,
+# every search order reaches one of them first
+UNSOLVABLE = "012345678" + "0" * 18 + "000000009" + "900000000" + "0" * 27 + "234567810"
+
+
+def test_board_to_bytes_round_trip():
+    board = sudoku.string_to_board(PUZZLE)
+    packed = sudoku.board_to_bytes(board)
+
+    assert len(packed) == 41
+    assert sudoku.bytes_to_board(packed) == board
+
+
+def test_bytes_to_board_rejects_truncated_input():
+    packed = sudoku.board_to_bytes(sudoku.string_to_board(PUZZLE))
+
+    with pytest.raises(ValueError):
+        sudoku.bytes_to_board(packed[:-1])
+
+
+def test_bytes_to_board_rejects_cell_greater_than_nine():
+    packed = bytearray(sudoku.board_to_bytes(sudoku.string_to_board(PUZZLE)))
+    packed[0] = 0xA0
+
+    with pytest.raises(ValueError):
+        sudoku.bytes_to_board(bytes(packed))
+
+
+def test_frames_round_trip():
+    payloads = [b"abc", b"", bytes(41)]
+
+    assert sudoku.unpack_frames(sudoku.pack_frames(payloads)) == payloads
+
+
+@pytest.mark.parametrize("cut", [1, 4])
+def test_unpack_frames_rejects_truncated_input(cut):
+    message = sudoku.pack_frames([b"abc"])
+
+    with pytest.raises(ValueError):
+        sudoku.unpack_frames(message[:-cut])
+
+
+def test_get_conflicts_is_empty_for_consistent_board():
+    assert sudoku.get_conflicts(sudoku.string_to_board(PUZZLE)) == []
+
+
+def test_get_conflicts_reports_both_clashing_cells():
+    # Same entry twice in a row, and twice in a column and square
+    board = sudoku.string_to_board("11" + "0" * 79)
+    board[4][8] = 5
+    board[5][7] = 5
+
+    assert sudoku.get_conflicts(board) == [(0, 0), (0, 1), (4, 8), (5, 7)]
+
+
+def test_get_hint_finds_naked_single():
+    board = sudoku.string_to_board(SOLUTION)
+    board[4][4] = 0
+
+    assert sudoku.get_hint(board) == (4, 4, int(SOLUTION[40]))
+
+
+def test_get_hint_finds_hidden_single():
+    # Entry 1 is ruled out of row 0 everywhere except cell (0, 0),
+    # which still has every other entry left as well
+    board = sudoku.string_to_board("0" * 81)
+    board[1][3] = 1
+    board[2][6] = 1
+    board[3][1] = 1
+    board[6][2] = 1
+
+    assert len(sudoku.get_valid_entries(board, 0, 0)) > 1
+    assert sudoku.get_hint(board) == (0, 0, 1)
+
+
+def test_get_hint_gives_up_when_cell_has_no_entry_left():
+    assert sudoku.get_hint(sudoku.string_to_board(UNSOLVABLE)) is None
+
+
+def is_valid_solution(board):
+    return all(0 not in row for row in board) and not sudoku.get_conflicts(board)
+
+
+@pytest.mark.parametrize("order", ["row", "reverse", "mrv"])
+@pytest.mark.parametrize("reverse_entries", [False, True])
+def test_solve_steps_solves_for_every_strategy(order, reverse_entries):
+    board = sudoku.string_to_board(PUZZLE)
+
+    steps = list(sudoku.solve_steps(board, order, reverse_entries))
+
+    assert steps[-1][0] == "solved"
+    assert is_valid_solution(board)
+    assert sudoku.board_to_string(board) == SOLUTION
+
+
+@pytest.mark.parametrize("order", ["row", "reverse", "mrv"])
+def test_solve_steps_fails_on_unsolvable_board(order):
+    board = sudoku.string_to_board(UNSOLVABLE)
+
+    steps = list(sudoku.solve_steps(board, order))
+
+    assert steps[-1][0] == "failed"
+    assert sudoku.board_to_string(board) == UNSOLVABLE
+
+
+def test_solve_steps_stops_before_exceeding_budget():
+    board = sudoku.string_to_board(PUZZLE)
+
+    steps = list(sudoku.solve_steps(board, budget=3))
+
+    assert [step[0] for step in steps].count("place") == 3
+    assert steps[-1][0] == "budget"
+    placed = sum(1 for i in range(81) if PUZZLE[i] == "0" and board[i // 9][i % 9])
+    assert placed <= 3
+
+
+def test_solve_iterative_matches_recursive_solve():
+    board = sudoku.string_to_board(PUZZLE)
+    expected = sudoku.string_to_board(PUZZLE)
+    sudoku.solve(expected, 0, 0)
+
+    assert sudoku.solve_iterative(board) is True
+    assert board == expected
+
+
+def test_solve_iterative_fails_on_unsolvable_board():
+    board = sudoku.string_to_board(UNSOLVABLE)
+
+    assert sudoku.solve_iterative(board) is False
+
+
+def test_solve_iterative_returns_none_when_budget_runs_out():
+    board = sudoku.string_to_board("0" * 81)
+
+    assert sudoku.solve_iterative(board, 5) is None